@@ -34,6 +34,11 @@ from textwrap import fill
 
 try:
     import yaml
+    try:
+        # The libyaml-backed loader is several times faster than the pure-Python one.
+        from yaml import CSafeLoader as _YamlLoader
+    except ImportError:
+        from yaml import SafeLoader as _YamlLoader
     _YAML_LOADED = True
 except ImportError:
     _YAML_LOADED = False
@@ -44,6 +49,13 @@ try:
 except ImportError:
     _JSON_LOADED = False
 
+try:
+    # Faster drop-in for parsing the runtime config, when installed.
+    import orjson
+    _ORJSON_LOADED = True
+except ImportError:
+    _ORJSON_LOADED = False
+
 
 # noinspection PyPep8Naming
 def N_(s): return s
@@ -54,6 +66,12 @@ CONFIG_FILE = os.path.expanduser(
     os.environ.get('XDG_CONFIG_HOME', '~/.config') + '/bambam/config.json'
 )
 
+# Top-level keys allowed in an extension's event_map.yaml
+EVENT_MAP_KEYS = frozenset({'apiVersion', 'image', 'sound'})
+
+# File name suffixes (lower case) recognized as background images
+BACKGROUND_SUFFIXES = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
+
 
 # TRANSLATORS: command string to toggle sound.
 # Must not contain spaces, and should be be at least 4 characters long,
@@ -125,6 +143,21 @@ def poll_for_any_key_press(clock):
 class Bambam:
     IMAGE_MAX_WIDTH = 700
     _HUE_SPACE = 360
+    _HUE_PALETTE = None
+
+    @classmethod
+    def _hue_palette(cls):
+        """
+        Return the RGBA tuples for every hue, computed on first use.
+        """
+        if cls._HUE_PALETTE is None:
+            palette = []
+            color = Color('white')
+            for hue in range(cls._HUE_SPACE):
+                color.hsva = (hue, 100, 100, 100)
+                palette.append(tuple(color))
+            cls._HUE_PALETTE = tuple(palette)
+        return cls._HUE_PALETTE
 
     def get_color(self):
         """
@@ -133,9 +166,7 @@ class Bambam:
         # Dividing by two results in a rate of change similar to the legacy
         # method of generating current color, based on current time.
         hue = int(self._event_count // 2) % self._HUE_SPACE
-        color = Color('white')
-        color.hsva = (hue, 100, 100, 100)
-        return color
+        return self._hue_palette()[hue]
 
     @classmethod
     def load_image(cls, fullname):
@@ -206,6 +237,9 @@ class Bambam:
         self.display_width = None
 
         self.sequence = ""
+        # Translated, lower-cased command words; filled in by run() once gettext is set up
+        self._command_words = {}
+        self._longest_command_word = 0
 
         self._sound_policies = dict()
         self._image_policies = dict()
@@ -216,13 +250,18 @@ class Bambam:
         self._keypress_count = 0
         self._next_mode_change_at = None
         self._next_bg_change_at = None
+        # (min, max) keypresses between changes, read from the runtime config once
+        self._mode_change_range = None
+        self._bg_change_range = None
+        # Keypress count at which the earliest of the above is due
+        self._next_trigger_at = math.inf
 
         # Background images
         self._background_images = []
         self._current_background_idx = 0
 
-        # All modes feature
-        self._available_extensions = []
+        # All modes feature; extensions are discovered on the first mode change
+        self._available_extensions = None
         self._current_extension_idx = 0
         self._all_modes_enabled = False
 
@@ -240,9 +279,11 @@ class Bambam:
         if not _JSON_LOADED or not os.path.exists(CONFIG_FILE):
             return None
         try:
-            with open(CONFIG_FILE, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
+            with open(CONFIG_FILE, 'rb') as f:
+                raw = f.read()
+            return orjson.loads(raw) if _ORJSON_LOADED else json.loads(raw)
+        except (ValueError, IOError):
+            # Both json.JSONDecodeError and orjson.JSONDecodeError are ValueErrors
             return None
 
     def _init_keypress_triggers(self, args):
@@ -255,22 +296,33 @@ class Bambam:
 
         # Mode change trigger
         if triggers.get('mode_change_enabled', False):
-            min_val = triggers.get('mode_change_min', 50)
-            max_val = triggers.get('mode_change_max', 150)
-            self._next_mode_change_at = self._random.randint(min_val, max_val)
+            self._mode_change_range = (triggers.get('mode_change_min', 50), triggers.get('mode_change_max', 150))
+            self._next_mode_change_at = self._random.randint(*self._mode_change_range)
             logging.debug('Next mode change at keypress %d', self._next_mode_change_at)
 
         # Background change trigger
         if triggers.get('background_change_enabled', False):
-            min_val = triggers.get('background_change_min', 30)
-            max_val = triggers.get('background_change_max', 100)
-            self._next_bg_change_at = self._random.randint(min_val, max_val)
+            self._bg_change_range = (triggers.get('background_change_min', 30),
+                                     triggers.get('background_change_max', 100))
+            self._next_bg_change_at = self._random.randint(*self._bg_change_range)
             logging.debug('Next background change at keypress %d', self._next_bg_change_at)
 
+        self._update_next_trigger()
+
+    def _update_next_trigger(self):
+        """Recompute the keypress count at which the next trigger is due."""
+        self._next_trigger_at = min(
+            (at for at in (self._next_mode_change_at, self._next_bg_change_at) if at),
+            default=math.inf)
+
     def _check_keypress_triggers(self):
         """Check and handle keypress triggers for mode/background changes."""
         self._keypress_count += 1
 
+        # Nearly every keypress ends here
+        if self._keypress_count < self._next_trigger_at:
+            return
+
         # Check mode change trigger
         if self._next_mode_change_at and self._keypress_count >= self._next_mode_change_at:
             self._trigger_mode_change()
@@ -279,26 +331,26 @@ class Bambam:
         if self._next_bg_change_at and self._keypress_count >= self._next_bg_change_at:
             self._trigger_background_change()
 
+        self._update_next_trigger()
+
     def _trigger_mode_change(self):
         """Trigger a random mode/extension change."""
+        if self._available_extensions is None:
+            self._discover_extensions()
         if not self._available_extensions:
             return
 
         # Pick a different extension
-        if len(self._available_extensions) > 1:
-            new_idx = self._random.randint(0, len(self._available_extensions) - 1)
-            while new_idx == self._current_extension_idx:
-                new_idx = self._random.randint(0, len(self._available_extensions) - 1)
-            self._current_extension_idx = new_idx
+        count = len(self._available_extensions)
+        if count > 1:
+            # A random non-zero offset always lands on another entry, without re-rolling
+            offset = self._random.randint(1, count - 1)
+            self._current_extension_idx = (self._current_extension_idx + offset) % count
             logging.info('Mode changed to: %s', self._available_extensions[self._current_extension_idx])
 
         # Schedule next mode change
-        config = self._runtime_config
-        if config:
-            triggers = config.get('keypress_triggers', {})
-            min_val = triggers.get('mode_change_min', 50)
-            max_val = triggers.get('mode_change_max', 150)
-            self._next_mode_change_at = self._keypress_count + self._random.randint(min_val, max_val)
+        if self._mode_change_range:
+            self._next_mode_change_at = self._keypress_count + self._random.randint(*self._mode_change_range)
 
     def _trigger_background_change(self):
         """Trigger a random background change."""
@@ -306,21 +358,16 @@ class Bambam:
             return
 
         # Pick a different background
-        if len(self._background_images) > 1:
-            new_idx = self._random.randint(0, len(self._background_images) - 1)
-            while new_idx == self._current_background_idx:
-                new_idx = self._random.randint(0, len(self._background_images) - 1)
-            self._current_background_idx = new_idx
+        count = len(self._background_images)
+        if count > 1:
+            offset = self._random.randint(1, count - 1)
+            self._current_background_idx = (self._current_background_idx + offset) % count
             self._apply_background_image()
             logging.info('Background changed to index: %d', self._current_background_idx)
 
         # Schedule next background change
-        config = self._runtime_config
-        if config:
-            triggers = config.get('keypress_triggers', {})
-            min_val = triggers.get('background_change_min', 30)
-            max_val = triggers.get('background_change_max', 100)
-            self._next_bg_change_at = self._keypress_count + self._random.randint(min_val, max_val)
+        if self._bg_change_range:
+            self._next_bg_change_at = self._keypress_count + self._random.randint(*self._bg_change_range)
 
     def _load_background_images(self, args):
         """Load available background images."""
@@ -337,16 +384,19 @@ class Bambam:
 
         # Load backgrounds from backgrounds directories
         for bg_dir in self.backgrounds_dirs:
-            if not os.path.isdir(bg_dir):
+            try:
+                entries = os.scandir(bg_dir)
+            except OSError:
                 continue
-            for fname in os.listdir(bg_dir):
-                if fname.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp')):
+            with entries:
+                for entry in entries:
+                    if not entry.name.lower().endswith(BACKGROUND_SUFFIXES) or not entry.is_file():
+                        continue
                     try:
-                        bg_path = os.path.join(bg_dir, fname)
-                        bg = pygame.image.load(bg_path)
+                        bg = pygame.image.load(entry.path)
                         self._background_images.append(bg)
                     except pygame.error as e:
-                        logging.warning('Failed to load background %s: %s', fname, e)
+                        logging.warning('Failed to load background %s: %s', entry.name, e)
 
     def _apply_background_image(self):
         """Apply the current background image to the screen."""
@@ -366,15 +416,18 @@ class Bambam:
         seen = set()
 
         for ext_dir in self.extensions_dirs:
-            if not os.path.isdir(ext_dir):
+            try:
+                entries = os.scandir(ext_dir)
+            except OSError:
                 continue
-            for name in os.listdir(ext_dir):
-                ext_path = os.path.join(ext_dir, name)
-                event_map = os.path.join(ext_path, 'event_map.yaml')
-                if os.path.isdir(ext_path) and os.path.exists(event_map):
-                    if name not in seen:
-                        self._available_extensions.append(name)
-                        seen.add(name)
+            with entries:
+                for entry in entries:
+                    # Earlier directories take precedence; is_dir() comes from the dirent
+                    if entry.name in seen or not entry.is_dir():
+                        continue
+                    if os.path.exists(os.path.join(entry.path, 'event_map.yaml')):
+                        self._available_extensions.append(entry.name)
+                        seen.add(entry.name)
 
         logging.debug('Discovered extensions: %s', self._available_extensions)
 
@@ -419,23 +472,27 @@ class Bambam:
         Keeps track of recently pressed keys and acts if they contain
         a valid command.
         """
-        self.sequence += last_keypress.lower()
-        if self.sequence.find(_(QUIT_STRING).lower()) > -1:
+        # Only the tail that could still complete a command word is kept, so the
+        # sequence does not grow for the whole session.
+        self.sequence = (self.sequence + last_keypress.lower())[-self._longest_command_word:]
+        # This runs after every key, so a command can only just have been completed.
+        words = self._command_words
+        if self.sequence.endswith(words[QUIT_STRING]):
             sys.exit(0)
-        if self.sequence.find(_(MOUSE_TOGGLE_STRING).lower()) > -1:
+        if self.sequence.endswith(words[MOUSE_TOGGLE_STRING]):
             self._sticky_mouse = not self._sticky_mouse
             self.sequence = ''
             return
         if not self._sound_enabled:
             return
-        if self.sequence.find(_(UNMUTE_STRING).lower()) > -1:
+        if self.sequence.endswith(words[UNMUTE_STRING]):
             self.sound_muted = False
             self.sequence = ''
-        elif self.sequence.find(_(MUTE_STRING).lower()) > -1:
+        elif self.sequence.endswith(words[MUTE_STRING]):
             self.sound_muted = True
             pygame.mixer.fadeout(1000)
             self.sequence = ''
-        elif self.sequence.find(_(SOUND_TOGGLE_STRING).lower()) > -1:
+        elif self.sequence.endswith(words[SOUND_TOGGLE_STRING]):
             self.sound_muted = not self.sound_muted
             self.sequence = ''
 
@@ -455,16 +512,16 @@ class Bambam:
         self.screen.blit(img, (w, h))
 
     def glob_dir(self, path, suffixes):
+        # str.endswith() takes a tuple, matching all suffixes in one call
+        suffixes = tuple(suffixes)
         files = []
-        for file_name in os.listdir(path):
-            path_name = os.path.join(path, file_name)
-            if os.path.isdir(path_name):
-                files.extend(self.glob_dir(path_name, suffixes))
-            else:
-                for ext in suffixes:
-                    if path_name.lower().endswith(ext):
-                        files.append(path_name)
-                        break
+        with os.scandir(path) as entries:
+            for entry in entries:
+                # is_dir() is answered from the directory entry, saving a stat per file
+                if entry.is_dir():
+                    files.extend(self.glob_dir(entry.path, suffixes))
+                elif entry.name.lower().endswith(suffixes):
+                    files.append(entry.path)
         return files
 
     def glob_data(self, suffixes):
@@ -723,11 +780,14 @@ class Bambam:
             event_map_file_name = os.path.join(extension_subdir, 'event_map.yaml')
             if not os.path.exists(event_map_file_name):
                 continue
-            with open(event_map_file_name) as event_map_file:
-                event_map = yaml.safe_load(event_map_file)
-                for k in event_map:
-                    if k not in ['apiVersion', 'image', 'sound']:
-                        raise ResourceLoadException(event_map_file_name, 'unrecognized key %s' % k)
+            # Hand the parser one buffer; libyaml also detects the encoding from the bytes
+            with open(event_map_file_name, 'rb') as event_map_file:
+                event_map = yaml.load(event_map_file.read(), Loader=_YamlLoader)
+                unknown_keys = event_map.keys() - EVENT_MAP_KEYS
+                if unknown_keys:
+                    # Sorted, so the message does not depend on string hash randomization
+                    raise ResourceLoadException(event_map_file_name,
+                                                'unrecognized key %s' % ', '.join(sorted(map(str, unknown_keys))))
                 apiVersion = event_map.get('apiVersion', 'undefined')
                 if apiVersion not in ['0', 0]:
                     raise ResourceLoadException(event_map_file_name, 'Unrecognized API version %s' % apiVersion)
@@ -745,6 +805,11 @@ class Bambam:
         self._add_base_dir(os.path.join(os.path.dirname(program_base), 'share', 'bambam'))
         self._add_base_dir(os.getenv('XDG_DATA_HOME', os.path.expanduser('~/.local/share/bambam')))
 
+        self._command_words = {
+            command: _(command).lower()
+            for command in (QUIT_STRING, MOUSE_TOGGLE_STRING, UNMUTE_STRING, MUTE_STRING, SOUND_TOGGLE_STRING)}
+        self._longest_command_word = max(len(word) for word in self._command_words.values())
+
         parser = argparse.ArgumentParser(
             description=_('Keyboard mashing and doodling game for babies and toddlers.'))
         if not _YAML_LOADED:
@@ -801,7 +866,6 @@ class Bambam:
         self._prepare_screen(args)
 
         # Initialize new features
-        self._discover_extensions()
         self._load_background_images(args)
         self._init_keypress_triggers(args)
 
@@ -884,6 +948,9 @@ def _show_mouse():
 
 
 class CollectionPolicyBase:
+    # Policies and mappers are consulted on every event; slots keep those reads cheap.
+    __slots__ = ('_things', '_things_by_file_name')
+
     def __init__(self, named_things):
         self._things = []
         self._things_by_file_name = {}
@@ -896,17 +963,23 @@ class CollectionPolicyBase:
 
 
 class DeterministicPolicy(CollectionPolicyBase):
+    __slots__ = ()
+
     def select(self, event):
         thing_idx = event.key % len(self._things)
         return self._things[thing_idx]
 
 
 class NamedFilePolicy(CollectionPolicyBase):
+    __slots__ = ()
+
     def select(self, _, file_name):
         return self._things_by_file_name[file_name]
 
 
 class RandomPolicy(CollectionPolicyBase):
+    __slots__ = ('_random',)
+
     def __init__(self, named_things, random_generator):
         super().__init__(named_things)
         self._random = random_generator
@@ -918,6 +991,8 @@ class RandomPolicy(CollectionPolicyBase):
 
 
 class FontImagePolicy:
+    __slots__ = ('_upper_case', '_random')
+
     COLORS = (
         (0, 0, 255), (255, 0, 0), (255, 255, 0),
         (255, 0, 128), (0, 0, 128), (0, 255, 0),
@@ -939,6 +1014,7 @@ class FontImagePolicy:
 
 
 class LegacySoundMapper:
+    __slots__ = ('_deterministic_sounds',)
 
     def __init__(self, deterministic_sounds: bool) -> None:
         self._deterministic_sounds = deterministic_sounds
@@ -953,17 +1029,18 @@ class LegacySoundMapper:
 
 
 class DeclarativeMapper:
+    __slots__ = ('_spec', '_steps')
 
     def __init__(self, spec):
         self._spec = spec
+        # Unpack each step once, rather than doing the dict lookups on every event
+        self._steps = [(step.get('check'), (step['policy'], step.get('args', None))) for step in spec]
 
     def map(self, event):
-        for step in self._spec:
-            if 'check' in step:
-                check_list = step['check']
-                if not self._match_list(event, check_list):
-                    continue
-            return step['policy'], step.get('args', None)
+        for check_list, result in self._steps:
+            if check_list is not None and not self._match_list(event, check_list):
+                continue
+            return result
         raise Exception('event %s matched no step in spec %s' % (
             event, self._spec))
 
@@ -998,6 +1075,7 @@ class DeclarativeMapper:
 
 
 class LegacyImageMapper:
+    __slots__ = ()
 
     def map(self, event):
         if event.type == pygame.KEYDOWN and (event.unicode.isalpha() or event.unicode.isdigit()):
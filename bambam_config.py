@@ -11,19 +11,55 @@ Configuration management for BamBam Plus.
 Handles persistent settings storage and runtime configuration.
 """
 
-import json
+import logging
 import os
-from dataclasses import dataclass, field, asdict
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from operator import attrgetter
 from typing import Optional, List
 
+try:
+    import orjson
+    _ORJSON_LOADED = True
+except ImportError:
+    import json
+    _ORJSON_LOADED = False
+
+_log = logging.getLogger(__name__)
+
+# Slotted dataclasses (Python 3.10+) are smaller and have faster attribute access
+_DATACLASS_OPTIONS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
 # Default config location following XDG spec
 DEFAULT_CONFIG_DIR = os.path.expanduser(
     os.environ.get('XDG_CONFIG_HOME', '~/.config') + '/bambam'
 )
 DEFAULT_CONFIG_FILE = os.path.join(DEFAULT_CONFIG_DIR, 'config.json')
 
+# Per-user data location, searched for extensions and backgrounds
+USER_DATA_DIR = os.path.expanduser('~/.local/share/bambam')
+
+# Directory this module is installed in
+PROGRAM_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Default search paths, in priority order
+DEFAULT_EXTENSION_DIRS = (
+    os.path.join(PROGRAM_DIR, 'extensions'),
+    os.path.join(USER_DATA_DIR, 'extensions'),
+    '/usr/share/bambam/extensions',
+)
+DEFAULT_BACKGROUND_DIRS = (
+    os.path.join(PROGRAM_DIR, 'backgrounds'),
+    os.path.join(USER_DATA_DIR, 'backgrounds'),
+    '/usr/share/bambam/backgrounds',
+)
+
+# File name suffixes (lower case) recognized as background images
+BACKGROUND_SUFFIXES = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
 
-@dataclass
+
+@dataclass(**_DATACLASS_OPTIONS)
 class ExtensionConfig:
     """Configuration for a single extension."""
     name: str
@@ -36,7 +72,7 @@ class ExtensionConfig:
     images_dir: str = "images"
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class KeypressRangeConfig:
     """Configuration for keypress-triggered random changes."""
     # Enable random mode change after N keypresses
@@ -50,7 +86,7 @@ class KeypressRangeConfig:
     background_change_max: int = 100
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class BackgroundConfig:
     """Background image configuration."""
     # Use custom background image
@@ -63,7 +99,7 @@ class BackgroundConfig:
     cycle_backgrounds: bool = False
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class DisplayConfig:
     """Display-related configuration."""
     dark_mode: bool = False
@@ -71,7 +107,7 @@ class DisplayConfig:
     fullscreen: bool = True
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class AudioConfig:
     """Audio-related configuration."""
     start_muted: bool = False
@@ -80,7 +116,7 @@ class AudioConfig:
     sound_blacklist: List[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class CageConfig:
     """Cage compositor integration configuration."""
     use_cage: bool = True
@@ -89,7 +125,23 @@ class CageConfig:
     cage_args: List[str] = field(default_factory=list)
 
 
-@dataclass
+# bambam.py switches emitted for enabled boolean settings, in command line order
+_BOOL_FLAGS = (
+    (attrgetter('display.uppercase'), '-u'),
+    (attrgetter('display.dark_mode'), '-D'),
+    (attrgetter('audio.start_muted'), '-m'),
+    (attrgetter('audio.deterministic_sounds'), '-d'),
+    (attrgetter('sticky_mouse'), '--sticky-mouse'),
+)
+
+# bambam.py options repeated once per entry of a list setting
+_LIST_FLAGS = (
+    (attrgetter('audio.sound_blacklist'), '--sound_blacklist'),
+    (attrgetter('image_blacklist'), '--image_blacklist'),
+)
+
+
+@dataclass(**_DATACLASS_OPTIONS)
 class BambamConfig:
     """Main configuration container for BamBam Plus."""
     # Display settings
@@ -122,33 +174,30 @@ class BambamConfig:
 
     def to_bambam_args(self) -> List[str]:
         """Convert configuration to bambam.py command line arguments."""
-        args = []
-
-        if self.current_extension:
-            args.extend(['-e', self.current_extension])
+        args = ['-e', self.current_extension] if self.current_extension else []
 
-        if self.display.uppercase:
-            args.append('-u')
+        for get_value, flag in _BOOL_FLAGS:
+            if get_value(self):
+                args.append(flag)
 
-        if self.display.dark_mode:
-            args.append('-D')
+        for get_values, option in _LIST_FLAGS:
+            for pattern in get_values(self):
+                args += (option, pattern)
 
-        if self.audio.start_muted:
-            args.append('-m')
-
-        if self.audio.deterministic_sounds:
-            args.append('-d')
+        return args
 
-        if self.sticky_mouse:
-            args.append('--sticky-mouse')
 
-        for pattern in self.audio.sound_blacklist:
-            args.extend(['--sound_blacklist', pattern])
+# Nested BambamConfig sections and the dataclass each one is decoded into
+_SECTION_TYPES = (
+    ('display', DisplayConfig),
+    ('audio', AudioConfig),
+    ('keypress_triggers', KeypressRangeConfig),
+    ('background', BackgroundConfig),
+    ('cage', CageConfig),
+)
 
-        for pattern in self.image_blacklist:
-            args.extend(['--image_blacklist', pattern])
-
-        return args
+# Top-level BambamConfig fields stored as plain JSON values
+_PLAIN_FIELDS = ('current_extension', 'all_modes_enabled', 'sticky_mouse', 'image_blacklist')
 
 
 def load_config(config_path: Optional[str] = None) -> BambamConfig:
@@ -156,49 +205,39 @@ def load_config(config_path: Optional[str] = None) -> BambamConfig:
     if config_path is None:
         config_path = DEFAULT_CONFIG_FILE
 
-    if not os.path.exists(config_path):
+    try:
+        signature = _file_signature(os.stat(config_path))
+    except OSError:
         return BambamConfig()
 
     try:
-        with open(config_path, 'r') as f:
-            data = json.load(f)
-
-        config = BambamConfig()
-
-        # Load display settings
-        if 'display' in data:
-            config.display = DisplayConfig(**data['display'])
-
-        # Load audio settings
-        if 'audio' in data:
-            config.audio = AudioConfig(**data['audio'])
+        # Reuse the bytes from the last load/save if the file is unchanged since
+        synced = _synced_files.get(config_path)
+        if synced is not None and synced[0] == signature:
+            raw = synced[1]
+        else:
+            with open(config_path, 'rb') as f:
+                raw = f.read()
+                _synced_files[config_path] = (_file_signature(os.fstat(f.fileno())), raw)
+        data = orjson.loads(raw) if _ORJSON_LOADED else json.loads(raw)
+
+        # Collect everything present in the file and construct the config
+        # once, so that defaults are only built for sections that are missing.
+        kwargs = {name: data[name] for name in _PLAIN_FIELDS if name in data}
+
+        # Load nested settings sections
+        for name, section_type in _SECTION_TYPES:
+            if name in data:
+                kwargs[name] = section_type(**data[name])
 
         # Load extension settings
-        config.current_extension = data.get('current_extension', '')
         if 'extensions' in data:
-            config.extensions = [ExtensionConfig(**ext) for ext in data['extensions']]
-
-        config.all_modes_enabled = data.get('all_modes_enabled', False)
-
-        # Load keypress triggers
-        if 'keypress_triggers' in data:
-            config.keypress_triggers = KeypressRangeConfig(**data['keypress_triggers'])
-
-        # Load background settings
-        if 'background' in data:
-            config.background = BackgroundConfig(**data['background'])
-
-        # Load cage settings
-        if 'cage' in data:
-            config.cage = CageConfig(**data['cage'])
-
-        config.sticky_mouse = data.get('sticky_mouse', False)
-        config.image_blacklist = data.get('image_blacklist', [])
+            kwargs['extensions'] = [ExtensionConfig(**ext) for ext in data['extensions']]
 
-        return config
+        return BambamConfig(**kwargs)
 
-    except (json.JSONDecodeError, TypeError, KeyError) as e:
-        print(f"Warning: Could not load config from {config_path}: {e}")
+    except (ValueError, TypeError, KeyError) as e:
+        _log.warning("Could not load config from %s: %s", config_path, e)
         return BambamConfig()
 
 
@@ -207,59 +246,159 @@ def save_config(config: BambamConfig, config_path: Optional[str] = None) -> bool
     if config_path is None:
         config_path = DEFAULT_CONFIG_FILE
 
+    if _ORJSON_LOADED:
+        # orjson serializes dataclasses natively and returns bytes
+        payload = orjson.dumps(config, option=orjson.OPT_INDENT_2)
+    else:
+        payload = json.dumps(config, default=_json_default, indent=2).encode('utf-8')
+
+    # Nothing to do if the file still holds exactly what we last read or wrote
+    synced = _synced_files.get(config_path)
+    if synced is not None and synced[1] == payload:
+        try:
+            if _file_signature(os.stat(config_path)) == synced[0]:
+                return True
+        except OSError:
+            pass
+
+    # Replace the file a symlinked config points at, not the link itself
+    target_path = os.path.realpath(config_path)
+    config_dir = os.path.dirname(target_path)
     try:
         # Ensure config directory exists
-        os.makedirs(os.path.dirname(config_path), exist_ok=True)
-
-        # Convert dataclass to dict recursively
-        data = _dataclass_to_dict(config)
-
-        with open(config_path, 'w') as f:
-            json.dump(data, f, indent=2)
+        _ensure_dir(config_dir)
+
+        # Write next to the target and rename over it, so an interrupted save
+        # never leaves a truncated config behind.
+        mode = _new_file_mode(target_path)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=config_dir, prefix='.config-', suffix='.tmp')
+        except FileNotFoundError:
+            # The directory was removed since _ensure_dir last saw it; recreate it once
+            _ensured_dirs.discard(config_dir)
+            _ensure_dir(config_dir)
+            fd, tmp_path = tempfile.mkstemp(dir=config_dir, prefix='.config-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                # mkstemp creates the file 0600; give it the mode a plain write would have
+                os.fchmod(f.fileno(), mode)
+                f.write(payload)
+                f.flush()
+                # Get the data on disk before the rename can be, or a crash or
+                # power loss could leave an empty file in place of the config.
+                os.fsync(f.fileno())
+                signature = _file_signature(os.fstat(f.fileno()))
+            os.replace(tmp_path, target_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        _synced_files[config_path] = (signature, payload)
 
         return True
 
     except (OSError, IOError) as e:
-        print(f"Error: Could not save config to {config_path}: {e}")
+        # Recheck the directory on the next save too
+        _ensured_dirs.discard(config_dir)
+        _log.error("Could not save config to %s: %s", config_path, e)
         return False
 
 
-def _dataclass_to_dict(obj):
-    """Recursively convert dataclass instances to dictionaries."""
+def _new_file_mode(path: str) -> int:
+    """Permission bits for a rewrite of path: its current mode, else 0666 less the umask."""
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except OSError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+# Per config file: (signature, contents) as of the last load_config/save_config
+_synced_files = {}
+
+
+def _file_signature(st: os.stat_result) -> tuple:
+    """Summarize a stat result well enough to notice the file being rewritten."""
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _json_default(obj):
+    """Expose a nested config dataclass to the stdlib encoder as a shallow dict.
+
+    Unlike asdict(), this does not deep-copy the tree up front; the encoder
+    walks the live objects and only asks for one small dict per dataclass.
+    """
     if hasattr(obj, '__dataclass_fields__'):
-        return {k: _dataclass_to_dict(v) for k, v in asdict(obj).items()}
-    elif isinstance(obj, list):
-        return [_dataclass_to_dict(item) for item in obj]
-    else:
-        return obj
+        return {name: getattr(obj, name) for name in obj.__dataclass_fields__}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# Directories already created (or found to exist) by _ensure_dir
+_ensured_dirs = set()
+
+
+def _ensure_dir(path: str):
+    """Create path if needed, skipping the syscall for directories handled before."""
+    if path in _ensured_dirs:
+        return
+    os.makedirs(path, exist_ok=True)
+    _ensured_dirs.add(path)
+
+
+# Background discovery results keyed by search dirs, with the dir mtimes they were scanned at
+_discovery_cache = {}
+
+
+def _dir_mtimes(base_dirs: List[str]) -> tuple:
+    """Return the mtime of each directory, or None where it is missing."""
+    mtimes = []
+    for base_dir in base_dirs:
+        try:
+            mtimes.append(os.stat(base_dir).st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    return tuple(mtimes)
+
+
+def _cached_scan(base_dirs: List[str], scan) -> List[str]:
+    """Run scan(base_dirs), reusing the last result while no directory has changed."""
+    key = tuple(base_dirs)
+    mtimes = _dir_mtimes(base_dirs)
+    cached = _discovery_cache.get(key)
+    if cached is None or cached[0] != mtimes:
+        cached = (mtimes, scan(base_dirs))
+        _discovery_cache[key] = cached
+    return list(cached[1])
 
 
 def discover_extensions(base_dirs: Optional[List[str]] = None) -> List[str]:
     """Discover available extensions in extension directories."""
     if base_dirs is None:
-        # Default extension directories
-        program_dir = os.path.dirname(os.path.abspath(__file__))
-        base_dirs = [
-            os.path.join(program_dir, 'extensions'),
-            os.path.expanduser('~/.local/share/bambam/extensions'),
-            '/usr/share/bambam/extensions',
-        ]
+        base_dirs = DEFAULT_EXTENSION_DIRS
+
+    # Not cached: adding or removing an event_map.yaml inside an existing
+    # extension directory leaves the base directory mtimes unchanged.
+    return _scan_extensions(base_dirs)
+
 
+def _scan_extensions(base_dirs: List[str]) -> List[str]:
+    """List extension directories (those with an event_map.yaml) under base_dirs."""
     extensions = []
     seen = set()
 
     for base_dir in base_dirs:
-        if not os.path.isdir(base_dir):
+        try:
+            entries = os.scandir(base_dir)
+        except OSError:
             continue
 
-        for name in os.listdir(base_dir):
-            ext_dir = os.path.join(base_dir, name)
-            event_map = os.path.join(ext_dir, 'event_map.yaml')
-
-            if os.path.isdir(ext_dir) and os.path.exists(event_map):
-                if name not in seen:
-                    extensions.append(name)
-                    seen.add(name)
+        with entries:
+            for entry in entries:
+                if entry.name in seen or not entry.is_dir():
+                    continue
+                if os.path.exists(os.path.join(entry.path, 'event_map.yaml')):
+                    extensions.append(entry.name)
+                    seen.add(entry.name)
 
     return sorted(extensions)
 
@@ -267,23 +406,25 @@ def discover_extensions(base_dirs: Optional[List[str]] = None) -> List[str]:
 def discover_backgrounds(base_dirs: Optional[List[str]] = None) -> List[str]:
     """Discover available background images."""
     if base_dirs is None:
-        program_dir = os.path.dirname(os.path.abspath(__file__))
-        base_dirs = [
-            os.path.join(program_dir, 'backgrounds'),
-            os.path.expanduser('~/.local/share/bambam/backgrounds'),
-            '/usr/share/bambam/backgrounds',
-        ]
+        base_dirs = DEFAULT_BACKGROUND_DIRS
+
+    return _cached_scan(base_dirs, _scan_backgrounds)
+
 
+def _scan_backgrounds(base_dirs: List[str]) -> List[str]:
+    """List image files directly under base_dirs."""
     backgrounds = []
-    image_exts = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
 
     for base_dir in base_dirs:
-        if not os.path.isdir(base_dir):
+        try:
+            entries = os.scandir(base_dir)
+        except OSError:
             continue
 
-        for name in os.listdir(base_dir):
-            if name.lower().endswith(image_exts):
-                backgrounds.append(os.path.join(base_dir, name))
+        with entries:
+            for entry in entries:
+                if entry.name.lower().endswith(BACKGROUND_SUFFIXES) and entry.is_file():
+                    backgrounds.append(entry.path)
 
     return sorted(backgrounds)
 
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# Copyright (C) 2026 BamBam Plus Contributors
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+"""Tests for bambam_config.py"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+
+import bambam_config
+
+
+class TestConfigPersistence(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.config_path = os.path.join(self._tmp_dir.name, 'bambam', 'config.json')
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_round_trip(self):
+        config = bambam_config.BambamConfig()
+        config.current_extension = 'alphanumeric-en_US'
+        config.display.dark_mode = True
+        config.audio.sound_blacklist = ['boom*']
+        config.extensions = [bambam_config.ExtensionConfig(name='alphanumeric-en_US', distinct_mode=True)]
+        config.keypress_triggers.mode_change_enabled = True
+        config.keypress_triggers.mode_change_max = 99
+
+        self.assertTrue(bambam_config.save_config(config, self.config_path))
+        self.assertEqual(bambam_config.load_config(self.config_path), config)
+
+    def test_save_replaces_file_without_leftovers(self):
+        config = bambam_config.BambamConfig()
+        self.assertTrue(bambam_config.save_config(config, self.config_path))
+        config.sticky_mouse = True
+        self.assertTrue(bambam_config.save_config(config, self.config_path))
+        self.assertEqual(os.listdir(os.path.dirname(self.config_path)), ['config.json'])
+        self.assertEqual(bambam_config.load_config(self.config_path), config)
+
+    def test_save_keeps_file_mode(self):
+        config = bambam_config.BambamConfig()
+        old_umask = os.umask(0o022)
+        try:
+            self.assertTrue(bambam_config.save_config(config, self.config_path))
+        finally:
+            os.umask(old_umask)
+        self.assertEqual(os.stat(self.config_path).st_mode & 0o777, 0o644)
+        os.chmod(self.config_path, 0o640)
+        config.sticky_mouse = True
+        self.assertTrue(bambam_config.save_config(config, self.config_path))
+        self.assertEqual(os.stat(self.config_path).st_mode & 0o777, 0o640)
+
+    def test_save_through_symlink_updates_target(self):
+        target_path = os.path.join(self._tmp_dir.name, 'real-config.json')
+        os.makedirs(os.path.dirname(self.config_path))
+        os.symlink(target_path, self.config_path)
+        config = bambam_config.BambamConfig()
+        config.sticky_mouse = True
+        self.assertTrue(bambam_config.save_config(config, self.config_path))
+        self.assertTrue(os.path.islink(self.config_path))
+        self.assertEqual(bambam_config.load_config(target_path), config)
+
+    def test_save_recreates_removed_config_dir(self):
+        config = bambam_config.BambamConfig()
+        self.assertTrue(bambam_config.save_config(config, self.config_path))
+        shutil.rmtree(os.path.dirname(self.config_path))
+        config.sticky_mouse = True
+        self.assertTrue(bambam_config.save_config(config, self.config_path))
+        self.assertEqual(bambam_config.load_config(self.config_path), config)
+
+    def test_unchanged_config_is_not_rewritten(self):
+        config = bambam_config.BambamConfig()
+        self.assertTrue(bambam_config.save_config(config, self.config_path))
+        with mock.patch('tempfile.mkstemp', side_effect=AssertionError('unexpected write')):
+            self.assertTrue(bambam_config.save_config(config, self.config_path))
+
+    def test_externally_modified_config_is_rewritten(self):
+        config = bambam_config.BambamConfig()
+        self.assertTrue(bambam_config.save_config(config, self.config_path))
+        with open(self.config_path, 'w') as f:
+            f.write('{}')
+        self.assertTrue(bambam_config.save_config(config, self.config_path))
+        with open(self.config_path) as f:
+            self.assertNotEqual(f.read(), '{}')
+
+    def test_unchanged_config_is_not_reread(self):
+        config = bambam_config.BambamConfig()
+        config.sticky_mouse = True
+        self.assertTrue(bambam_config.save_config(config, self.config_path))
+        with mock.patch('builtins.open', side_effect=AssertionError('unexpected read')):
+            loaded = bambam_config.load_config(self.config_path)
+        self.assertEqual(loaded, config)
+        self.assertIsNot(loaded, config)
+
+    def test_missing_file_gives_defaults(self):
+        self.assertEqual(bambam_config.load_config(self.config_path), bambam_config.BambamConfig())
+
+    def test_corrupt_file_gives_defaults(self):
+        os.makedirs(os.path.dirname(self.config_path))
+        with open(self.config_path, 'w') as f:
+            f.write('{not json')
+        with self.assertLogs('bambam_config', level='WARNING'):
+            self.assertEqual(bambam_config.load_config(self.config_path), bambam_config.BambamConfig())
+
+
+class TestBambamArgs(unittest.TestCase):
+
+    def test_defaults(self):
+        self.assertEqual(bambam_config.BambamConfig().to_bambam_args(), [])
+
+    def test_all_options(self):
+        config = bambam_config.BambamConfig()
+        config.current_extension = 'alphanumeric-en_US'
+        config.display.uppercase = True
+        config.display.dark_mode = True
+        config.audio.start_muted = True
+        config.audio.deterministic_sounds = True
+        config.audio.sound_blacklist = ['boom*', 'splat*']
+        config.sticky_mouse = True
+        config.image_blacklist = ['tux*']
+        self.assertEqual(config.to_bambam_args(), [
+            '-e', 'alphanumeric-en_US', '-u', '-D', '-m', '-d', '--sticky-mouse',
+            '--sound_blacklist', 'boom*', '--sound_blacklist', 'splat*', '--image_blacklist', 'tux*'])
+
+
+class TestDiscovery(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.base_dir = self._tmp_dir.name
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _touch(self, *parts):
+        path = os.path.join(self.base_dir, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, 'w').close()
+
+    def test_discover_extensions(self):
+        self._touch('zebra', 'event_map.yaml')
+        self._touch('alpha', 'event_map.yaml')
+        self._touch('incomplete', 'sounds', 'a.wav')
+        self._touch('stray-file')
+        missing_dir = os.path.join(self.base_dir, 'missing')
+        self.assertEqual(bambam_config.discover_extensions([self.base_dir, missing_dir, self.base_dir]),
+                         ['alpha', 'zebra'])
+
+    def test_discover_extensions_notices_new_event_map(self):
+        os.mkdir(os.path.join(self.base_dir, 'alpha'))
+        self.assertEqual(bambam_config.discover_extensions([self.base_dir]), [])
+        self._touch('alpha', 'event_map.yaml')
+        self.assertEqual(bambam_config.discover_extensions([self.base_dir]), ['alpha'])
+
+    def test_discover_backgrounds_rescans_changed_dir(self):
+        self._touch('a.png')
+        self.assertEqual(bambam_config.discover_backgrounds([self.base_dir]), [os.path.join(self.base_dir, 'a.png')])
+        self._touch('b.png')
+        # Make sure the directory mtime moves even on coarse-grained timestamps.
+        mtime_ns = os.stat(self.base_dir).st_mtime_ns + 1_000_000_000
+        os.utime(self.base_dir, ns=(mtime_ns, mtime_ns))
+        self.assertEqual(bambam_config.discover_backgrounds([self.base_dir]),
+                         [os.path.join(self.base_dir, name) for name in ('a.png', 'b.png')])
+
+    def test_discover_backgrounds(self):
+        self._touch('b.PNG')
+        self._touch('a.jpg')
+        self._touch('c.Jpeg')
+        self._touch('notes.txt')
+        os.mkdir(os.path.join(self.base_dir, 'dir.png'))
+        self.assertEqual(bambam_config.discover_backgrounds([self.base_dir]),
+                         [os.path.join(self.base_dir, name) for name in ('a.jpg', 'b.PNG', 'c.Jpeg')])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -15,33 +15,92 @@ with optional cage compositor integration for Wayland.
 import curses
 import os
 import shutil
-import subprocess
+import signal
 import sys
-from typing import List, Optional, Callable
+import threading
+from typing import Dict, List, Optional, Callable, Tuple, Union
 
 from bambam_config import (
     load_config, save_config,
     discover_extensions, discover_backgrounds,
+    PROGRAM_DIR,
 )
 
 
+HELP_TEXT = "↑↓:Navigate  Enter:Select  ←→:Adjust  q:Quit"
+
+
+# Commands already found on PATH; misses are not remembered, so installing a
+# missing tool (e.g. cage) takes effect without restarting the TUI
+_found_commands: Dict[str, str] = {}
+
+
+def _which(name: str) -> Optional[str]:
+    """shutil.which(), reusing earlier successful lookups."""
+    path = _found_commands.get(name)
+    if path is None:
+        path = shutil.which(name)
+        if path is not None:
+            _found_commands[name] = path
+    return path
+
+
+def run_command(cmd: List[str]) -> int:
+    """Run a command in the foreground and return its exit code.
+
+    Uses posix_spawn where available, which avoids copying the page tables of
+    this (curses-holding) process the way a plain fork would.
+    """
+    if not hasattr(os, 'posix_spawnp'):
+        import subprocess
+        return subprocess.run(cmd).returncode
+    pid = os.posix_spawnp(cmd[0], cmd, os.environ)
+    try:
+        _, status = os.waitpid(pid, 0)
+    except BaseException:
+        # Like subprocess.run: don't leave the child running or unreaped
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+        raise
+    return os.waitstatus_to_exitcode(status)
+
+
 class MenuItem:
     """Represents a single menu item."""
 
+    __slots__ = ('label', 'action', 'submenu', 'value_getter', 'on_adjust', '_rendered_key', '_rendered')
+
     def __init__(self, label: str, action: Optional[Callable] = None,
-                 submenu: Optional['Menu'] = None,
-                 value_getter: Optional[Callable[[], str]] = None):
+                 submenu: Union['Menu', Callable[[], 'Menu'], None] = None,
+                 value_getter: Optional[Callable[[], str]] = None,
+                 on_adjust: Optional[Callable[[int], None]] = None):
         self.label = label
         self.action = action
+        # Either a Menu, or a function building it on first use
         self.submenu = submenu
         self.value_getter = value_getter
+        # Called with a step when the value is adjusted with ←/→
+        self.on_adjust = on_adjust
+        # (width, value) the cached display text was formatted for
+        self._rendered_key = None
+        self._rendered = label
+
+    def get_submenu(self) -> Optional['Menu']:
+        """Get the submenu, building it first if needed."""
+        if callable(self.submenu):
+            self.submenu = self.submenu()
+        return self.submenu
 
     def get_display_text(self, width: int = 40) -> str:
         """Get display text with optional value."""
         if self.value_getter:
             value = self.value_getter()
-            label_width = width - len(value) - 3
-            return f"{self.label:<{label_width}} [{value}]"
+            key = (width, value)
+            if self._rendered_key != key:
+                label_width = width - len(value) - 3
+                self._rendered = f"{self.label:<{label_width}} [{value}]"
+                self._rendered_key = key
+            return self._rendered
         return self.label
 
 
@@ -52,10 +111,44 @@ class Menu:
         self.title = title
         self.items = items
         self.selected = 0
+        # (screen width, config version) the cached row texts were built for
+        self._row_key = None
+        self._row_texts: List[Tuple[str, str]] = []
+        # Indices of items that can be selected, and each one's position in that list
+        self._selectable: Optional[List[int]] = None
+        self._selectable_pos: Dict[int, int] = {}
 
     def add_item(self, item: MenuItem):
         """Add an item to the menu."""
         self.items.append(item)
+        self._row_key = None
+        self._selectable = None
+
+    def move_selection(self, step: int):
+        """Move the selection by step selectable items, skipping separators."""
+        if self._selectable is None:
+            self._selectable = [i for i, item in enumerate(self.items) if item.label]
+            self._selectable_pos = {index: pos for pos, index in enumerate(self._selectable)}
+        pos = self._selectable_pos.get(self.selected)
+        if pos is None:
+            return
+        new_pos = pos + step
+        if 0 <= new_pos < len(self._selectable):
+            self.selected = self._selectable[new_pos]
+
+    def get_row_texts(self, width: int, config_version: int) -> List[Tuple[str, str]]:
+        """Get the (unselected, selected) row text of all items for a screen width.
+
+        Rebuilt only when the width or the configuration changed.
+        """
+        key = (width, config_version)
+        if self._row_key != key:
+            self._row_texts = []
+            for item in self.items:
+                text = item.get_display_text(width - 4)
+                self._row_texts.append((f"  {text}", f" {text:<{width-5}} "))
+            self._row_key = key
+        return self._row_texts
 
 
 class BambamTUI:
@@ -75,6 +168,14 @@ class BambamTUI:
         self.running = True
         self.message = ""
         self.message_is_error = False
+        # Bumped whenever an action may have changed the configuration
+        self.config_version = 0
+        # Screen size and rows ({y: (x, text, attr)}) as of the last draw()
+        self._screen_size = None
+        self._drawn_rows = {}
+        # (width, title) the cached header box lines were built for
+        self._header_key = None
+        self._header_lines = ()
 
         # Find bambam.py location
         self.bambam_path = self._find_bambam()
@@ -87,16 +188,26 @@ class BambamTUI:
         self.current_menu = self.main_menu
         self.menu_stack: List[Menu] = []
 
+        # Do the submenus' filesystem lookups while the user looks at the main menu
+        threading.Thread(target=self._prewarm, daemon=True).start()
+
+    def _prewarm(self):
+        """Fill the background discovery and PATH lookup caches used by the submenus.
+
+        Extension discovery is not cached, so there is nothing to warm for it.
+        """
+        discover_backgrounds()
+        _which('cage')
+
     def _find_bambam(self) -> str:
         """Find the bambam.py script."""
-        # Check same directory as this script
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        bambam_path = os.path.join(script_dir, 'bambam.py')
+        # Check same directory as this script (bambam_config lives alongside it)
+        bambam_path = os.path.join(PROGRAM_DIR, 'bambam.py')
         if os.path.exists(bambam_path):
             return bambam_path
 
         # Check system paths
-        for path in ['/usr/games/bambam', '/usr/local/bin/bambam']:
+        for path in ('/usr/games/bambam', '/usr/local/bin/bambam'):
             if os.path.exists(path):
                 return path
 
@@ -123,12 +234,13 @@ class BambamTUI:
             MenuItem("▶  Start BamBam (with Cage)", action=self._start_bambam_cage),
             MenuItem("▶  Run All Modes", action=self._start_all_modes),
             MenuItem(""),  # Separator
-            MenuItem("⚙  Extension Settings", submenu=self._build_extension_menu()),
-            MenuItem("⚙  Display Settings", submenu=self._build_display_menu()),
-            MenuItem("⚙  Audio Settings", submenu=self._build_audio_menu()),
-            MenuItem("⚙  Background Settings", submenu=self._build_background_menu()),
-            MenuItem("⚙  Keypress Triggers", submenu=self._build_keypress_menu()),
-            MenuItem("⚙  Cage Settings", submenu=self._build_cage_menu()),
+            # Submenus are only built when first opened
+            MenuItem("⚙  Extension Settings", submenu=self._build_extension_menu),
+            MenuItem("⚙  Display Settings", submenu=self._build_display_menu),
+            MenuItem("⚙  Audio Settings", submenu=self._build_audio_menu),
+            MenuItem("⚙  Background Settings", submenu=self._build_background_menu),
+            MenuItem("⚙  Keypress Triggers", submenu=self._build_keypress_menu),
+            MenuItem("⚙  Cage Settings", submenu=self._build_cage_menu),
             MenuItem(""),  # Separator
             MenuItem("💾  Save Configuration", action=self._save_config),
             MenuItem("🔄  Reload Configuration", action=self._reload_config),
@@ -159,7 +271,7 @@ class BambamTUI:
         items.append(MenuItem(""))
         items.append(MenuItem("Distinct Mode (audio+image pairing)",
                               action=self._toggle_distinct_mode,
-                              value_getter=lambda: "ON" if (self._get_current_ext_config() and self._get_current_ext_config().distinct_mode) else "OFF"))
+                              value_getter=self._distinct_mode_label))
 
         return Menu("Extension Settings", items)
 
@@ -235,9 +347,11 @@ class BambamTUI:
                      value_getter=lambda: "ON" if self.config.keypress_triggers.mode_change_enabled else "OFF"),
             MenuItem("Min Keypresses",
                      action=lambda: self._adjust_value('mode_min', -10),
+                     on_adjust=lambda delta: self._adjust_value('mode_min', delta),
                      value_getter=lambda: str(self.config.keypress_triggers.mode_change_min)),
             MenuItem("Max Keypresses",
                      action=lambda: self._adjust_value('mode_max', 10),
+                     on_adjust=lambda delta: self._adjust_value('mode_max', delta),
                      value_getter=lambda: str(self.config.keypress_triggers.mode_change_max)),
             MenuItem(""),
             MenuItem("═══ Random Background Change ═══"),
@@ -246,9 +360,11 @@ class BambamTUI:
                      value_getter=lambda: "ON" if self.config.keypress_triggers.background_change_enabled else "OFF"),
             MenuItem("Min Keypresses",
                      action=lambda: self._adjust_value('bg_min', -10),
+                     on_adjust=lambda delta: self._adjust_value('bg_min', delta),
                      value_getter=lambda: str(self.config.keypress_triggers.background_change_min)),
             MenuItem("Max Keypresses",
                      action=lambda: self._adjust_value('bg_max', 10),
+                     on_adjust=lambda delta: self._adjust_value('bg_max', delta),
                      value_getter=lambda: str(self.config.keypress_triggers.background_change_max)),
             MenuItem(""),
             MenuItem("(Use ←/→ arrows to adjust values)"),
@@ -256,7 +372,7 @@ class BambamTUI:
 
     def _build_cage_menu(self) -> Menu:
         """Build cage compositor settings menu."""
-        cage_available = shutil.which('cage') is not None
+        cage_available = _which('cage') is not None
         status = "installed" if cage_available else "NOT FOUND"
 
         return Menu("Cage Compositor Settings", [
@@ -314,6 +430,11 @@ class BambamTUI:
                 return ext
         return None
 
+    def _distinct_mode_label(self) -> str:
+        """Distinct mode state of the current extension, looked up once per draw."""
+        ext_config = self._get_current_ext_config()
+        return "ON" if ext_config and ext_config.distinct_mode else "OFF"
+
     def _toggle_distinct_mode(self):
         """Toggle distinct mode for current extension."""
         ext_config = self._get_current_ext_config()
@@ -364,6 +485,7 @@ class BambamTUI:
 
     def _adjust_value(self, which: str, delta: int):
         """Adjust a numeric value. Called by arrow keys."""
+        self.config_version += 1
         triggers = self.config.keypress_triggers
         if which == 'mode_min':
             triggers.mode_change_min = max(1, triggers.mode_change_min + delta)
@@ -380,7 +502,7 @@ class BambamTUI:
 
     def _start_bambam_cage(self):
         """Start BamBam with cage compositor."""
-        if not shutil.which('cage'):
+        if not _which('cage'):
             self.message = "Cage not installed! Run: sudo apt install cage"
             self.message_is_error = True
             return
@@ -405,36 +527,49 @@ class BambamTUI:
             cage_cmd.extend(cmd)
             cmd = cage_cmd
 
-        # End curses temporarily
+        # End curses temporarily, remembering the terminal modes to come back to
+        curses.def_prog_mode()
         curses.endwin()
 
         try:
             self.message = "Starting BamBam..."
             print(f"\n[BamBam TUI] Launching: {' '.join(cmd)}\n")
-            subprocess.run(cmd)
+            run_command(cmd)
         except Exception as e:
             self.message = f"Failed to start: {e}"
             self.message_is_error = True
         finally:
-            # Restore curses
-            self.stdscr = curses.initscr()
-            self._init_curses()
+            # Resume curses on the existing screen; colour pairs and keypad
+            # mode are intact, only the cursor needs hiding again.
+            curses.reset_prog_mode()
+            curses.curs_set(0)
+            # Whatever BamBam left on the terminal has to be painted over
+            self._screen_size = None
 
     def draw(self):
-        """Draw the current screen."""
-        self.stdscr.clear()
+        """Draw the current screen, only repainting rows that changed."""
         height, width = self.stdscr.getmaxyx()
-
-        # Draw header
-        header = "╔" + "═" * (width - 2) + "╗"
-        self.stdscr.addstr(0, 0, header[:width-1], curses.color_pair(self.COLOR_HEADER))
-
-        title = f"║ {self.current_menu.title} "
-        title = title + " " * (width - len(title) - 1) + "║"
-        self.stdscr.addstr(1, 0, title[:width-1], curses.color_pair(self.COLOR_HEADER))
-
-        footer_header = "╚" + "═" * (width - 2) + "╝"
-        self.stdscr.addstr(2, 0, footer_header[:width-1], curses.color_pair(self.COLOR_HEADER))
+        if (height, width) != self._screen_size:
+            # New geometry (or first frame): repaint everything
+            self._screen_size = (height, width)
+            self._drawn_rows = {}
+            self.stdscr.clear()
+
+        # Compose the frame as {y: (x, text, attr)}
+        rows = {}
+        header_attr = curses.color_pair(self.COLOR_HEADER)
+
+        # Draw header, rebuilding the box only for a new width or menu
+        header_key = (width, self.current_menu.title)
+        if self._header_key != header_key:
+            header = "╔" + "═" * (width - 2) + "╗"
+            title = f"║ {self.current_menu.title} "
+            title = title + " " * (width - len(title) - 1) + "║"
+            footer_header = "╚" + "═" * (width - 2) + "╝"
+            self._header_lines = (header[:width-1], title[:width-1], footer_header[:width-1])
+            self._header_key = header_key
+        for y, line in enumerate(self._header_lines):
+            rows[y] = (0, line, header_attr)
 
         # Draw menu items
         start_y = 4
@@ -446,43 +581,60 @@ class BambamTUI:
             scroll_offset = self.current_menu.selected - max_items + 1
 
         visible_items = self.current_menu.items[scroll_offset:scroll_offset + max_items]
+        row_texts = self.current_menu.get_row_texts(width, self.config_version)
+        selected = self.current_menu.selected
+        normal_attr = curses.color_pair(self.COLOR_NORMAL)
+        selected_attr = curses.color_pair(self.COLOR_SELECTED) | curses.A_BOLD
 
         for i, item in enumerate(visible_items):
             y = start_y + i
             if y >= height - 3:
                 break
 
-            actual_index = i + scroll_offset
-            is_selected = actual_index == self.current_menu.selected
-
             # Skip separators
             if not item.label:
                 continue
 
-            display_text = item.get_display_text(width - 4)
-
-            if is_selected:
-                attr = curses.color_pair(self.COLOR_SELECTED) | curses.A_BOLD
-                self.stdscr.addstr(y, 2, f" {display_text:<{width-5}} ", attr)
+            actual_index = i + scroll_offset
+            if actual_index == selected:
+                rows[y] = (2, row_texts[actual_index][1], selected_attr)
             else:
-                attr = curses.color_pair(self.COLOR_NORMAL)
-                self.stdscr.addstr(y, 2, f"  {display_text}", attr)
+                rows[y] = (2, row_texts[actual_index][0], normal_attr)
 
         # Draw message if any
         if self.message:
             msg_y = height - 2
             color = self.COLOR_ERROR if self.message_is_error else self.COLOR_SUCCESS
-            self.stdscr.addstr(msg_y, 2, self.message[:width-4], curses.color_pair(color))
+            rows[msg_y] = (2, self.message[:width-4], curses.color_pair(color))
 
         # Draw help bar
-        help_text = "↑↓:Navigate  Enter:Select  ←→:Adjust  q:Quit"
-        self.stdscr.addstr(height - 1, 2, help_text[:width-4], curses.A_DIM)
+        rows[height - 1] = (2, HELP_TEXT[:width-4], curses.A_DIM)
+
+        # Write out only the rows that differ from the previous frame. A row
+        # always starts at the same column, so it only needs clearing when the
+        # new text is shorter than what is already on screen.
+        drawn_rows = self._drawn_rows
+        for y in range(height):
+            row = rows.get(y)
+            old_row = drawn_rows.get(y)
+            if row == old_row:
+                continue
+            if row is None:
+                self.stdscr.move(y, 0)
+                self.stdscr.clrtoeol()
+                continue
+            self.stdscr.addstr(y, *row)
+            if old_row is not None and len(row[1]) < len(old_row[1]):
+                self.stdscr.clrtoeol()
+        self._drawn_rows = rows
 
-        self.stdscr.refresh()
+        self.stdscr.noutrefresh()
+        curses.doupdate()
 
-    def handle_input(self):
-        """Handle keyboard input."""
-        key = self.stdscr.getch()
+    def handle_input(self, key: Optional[int] = None):
+        """Handle keyboard input, reading a key if none is given."""
+        if key is None:
+            key = self.stdscr.getch()
 
         # Clear message on any keypress
         self.message = ""
@@ -494,59 +646,27 @@ class BambamTUI:
                 self.running = False
 
         elif key == curses.KEY_UP:
-            # Move up, skipping empty items
-            new_pos = self.current_menu.selected - 1
-            while new_pos >= 0 and not self.current_menu.items[new_pos].label:
-                new_pos -= 1
-            if new_pos >= 0:
-                self.current_menu.selected = new_pos
+            self.current_menu.move_selection(-1)
 
         elif key == curses.KEY_DOWN:
-            # Move down, skipping empty items
-            new_pos = self.current_menu.selected + 1
-            while new_pos < len(self.current_menu.items) and not self.current_menu.items[new_pos].label:
-                new_pos += 1
-            if new_pos < len(self.current_menu.items):
-                self.current_menu.selected = new_pos
+            self.current_menu.move_selection(1)
 
         elif key in (curses.KEY_ENTER, ord('\n'), ord(' ')):
             item = self.current_menu.items[self.current_menu.selected]
-            if item.submenu:
+            submenu = item.get_submenu()
+            if submenu:
                 self.menu_stack.append(self.current_menu)
-                self.current_menu = item.submenu
+                self.current_menu = submenu
                 self.current_menu.selected = 0
             elif item.action:
                 item.action()
+                self.config_version += 1
 
-        elif key == curses.KEY_LEFT:
-            # Decrease value for current item
-            item = self.current_menu.items[self.current_menu.selected]
-            if 'Min' in item.label or 'Max' in item.label:
-                if 'Mode' in self.current_menu.title or 'Keypress' in self.current_menu.title:
-                    if 'Mode' in item.label and 'Min' in item.label:
-                        self._adjust_value('mode_min', -10)
-                    elif 'Mode' in item.label and 'Max' in item.label:
-                        self._adjust_value('mode_max', -10)
-                    elif 'Background' in item.label or 'bg' in item.label.lower():
-                        if 'Min' in item.label:
-                            self._adjust_value('bg_min', -10)
-                        else:
-                            self._adjust_value('bg_max', -10)
-
-        elif key == curses.KEY_RIGHT:
-            # Increase value for current item
+        elif key in (curses.KEY_LEFT, curses.KEY_RIGHT):
+            # Adjust the value of the current item, if it has one
             item = self.current_menu.items[self.current_menu.selected]
-            if 'Min' in item.label or 'Max' in item.label:
-                if 'Mode' in self.current_menu.title or 'Keypress' in self.current_menu.title:
-                    if 'Mode' in item.label and 'Min' in item.label:
-                        self._adjust_value('mode_min', 10)
-                    elif 'Mode' in item.label and 'Max' in item.label:
-                        self._adjust_value('mode_max', 10)
-                    elif 'Background' in item.label or 'bg' in item.label.lower():
-                        if 'Min' in item.label:
-                            self._adjust_value('bg_min', 10)
-                        else:
-                            self._adjust_value('bg_max', 10)
+            if item.on_adjust:
+                item.on_adjust(10 if key == curses.KEY_RIGHT else -10)
 
         elif key == curses.KEY_BACKSPACE or key == 127:
             self._go_back()
@@ -556,6 +676,17 @@ class BambamTUI:
         while self.running:
             self.draw()
             self.handle_input()
+            # Apply keys that queued up meanwhile (e.g. a held arrow key)
+            # before drawing again, so a burst costs a single redraw.
+            self.stdscr.nodelay(True)
+            try:
+                while self.running:
+                    key = self.stdscr.getch()
+                    if key == -1:
+                        break
+                    self.handle_input(key)
+            finally:
+                self.stdscr.nodelay(False)
 
 
 def main(stdscr):
@@ -14,10 +14,23 @@ Usage: python3 scripts/fact_check.py [--fix]
 
 import argparse
 import ast
+import os
+import re
 import subprocess
 import sys
+import tempfile
 from pathlib import Path
 
+try:
+    import yaml
+    try:
+        from yaml import CSafeLoader as _YamlLoader
+    except ImportError:
+        from yaml import SafeLoader as _YamlLoader
+    _YAML_LOADED = True
+except ImportError:
+    _YAML_LOADED = False
+
 # Known good apt packages for Pi 5 Lite (Bookworm)
 PI5_APT_PACKAGES = {
     'python3': '3.11',
@@ -34,21 +47,36 @@ OPTIONAL_IMPORTS = ['yaml']
 # Extension API version
 SUPPORTED_API_VERSION = [0, '0']
 
+# Valid top-level keys of event_map.yaml
+VALID_EVENT_MAP_KEYS = frozenset({'apiVersion', 'image', 'sound'})
+
 # Valid policies
-VALID_IMAGE_POLICIES = ['font', 'random', 'named_file']
-VALID_SOUND_POLICIES = ['random', 'deterministic', 'named_file']
+VALID_IMAGE_POLICIES = frozenset({'font', 'random', 'named_file'})
+VALID_SOUND_POLICIES = frozenset({'random', 'deterministic', 'named_file'})
 
 # Valid check types
-VALID_CHECK_TYPES = ['KEYDOWN']
-VALID_UNICODE_CHECKS = ['isalpha', 'isdigit', 'value']
+VALID_CHECK_TYPES = frozenset({'KEYDOWN'})
+VALID_UNICODE_CHECKS = frozenset({'isalpha', 'isdigit', 'value'})
+
+# Source patterns flagged by the Pi 5 compatibility check, matched in one pass:
+# group 1 is shell=True, group 2 a hardcoded system path
+_PI5_PATTERNS = re.compile(rb'(shell=True)|(/usr/lib|/opt/)')
 
 
 class FactChecker:
+    # Modules already known to import successfully
+    _importable = set()
+
     def __init__(self, root_dir: str):
         self.root_dir = Path(root_dir)
         self.errors = []
         self.warnings = []
         self.info = []
+        # File contents and parsed syntax trees, so files checked more than
+        # once are only read and parsed once
+        self._sources = {}
+        self._trees = {}
+        self._py_files = None
 
     def error(self, msg: str):
         self.errors.append(f"❌ ERROR: {msg}")
@@ -59,12 +87,42 @@ class FactChecker:
     def ok(self, msg: str):
         self.info.append(f"✅ OK: {msg}")
 
+    def _root_py_files(self) -> list:
+        """List the Python files in the root directory, scanning it only once."""
+        if self._py_files is None:
+            self._py_files = list(self.root_dir.glob('*.py'))
+        return self._py_files
+
+    def _read(self, filepath: Path) -> bytes:
+        """Read a file, reusing the contents from an earlier check."""
+        source = self._sources.get(filepath)
+        if source is None:
+            source = self._sources[filepath] = filepath.read_bytes()
+        return source
+
+    def _parse(self, filepath: Path) -> ast.AST:
+        """Parse a Python file, reusing the tree from an earlier check."""
+        tree = self._trees.get(filepath)
+        if tree is None:
+            # ast.parse() decodes bytes itself, honouring any coding cookie
+            tree = self._trees[filepath] = ast.parse(self._read(filepath), filename=str(filepath))
+        return tree
+
+    def _can_import(self, name: str) -> bool:
+        """Check that a module can be imported, importing it at most once."""
+        if name in self._importable or name in sys.modules:
+            return True
+        try:
+            __import__(name)
+        except ImportError:
+            return False
+        self._importable.add(name)
+        return True
+
     def check_python_syntax(self, filepath: Path) -> bool:
         """Verify Python file syntax."""
         try:
-            with open(filepath) as f:
-                source = f.read()
-            ast.parse(source)
+            self._parse(filepath)
             self.ok(f"Syntax valid: {filepath.name}")
             return True
         except SyntaxError as e:
@@ -73,6 +131,36 @@ class FactChecker:
 
     def check_flake8(self) -> bool:
         """Run flake8 linting."""
+        try:
+            from flake8.main.application import Application
+        except ImportError:
+            return self._check_flake8_command()
+
+        # Lint in-process, with the same arguments as the command line tool,
+        # rather than starting a second interpreter. The root's config file is
+        # passed explicitly since flake8 would otherwise look in the working directory.
+        args = [str(self.root_dir), '--max-line-length=120']
+        config_file = self._flake8_config_file()
+        if config_file is not None:
+            args.append(f'--config={config_file}')
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_file = os.path.join(tmp_dir, 'flake8.txt')
+            flake8 = Application()
+            try:
+                flake8.run(args + [f'--output-file={output_file}'])
+            except (Exception, SystemExit) as e:
+                # e.g. an invalid option value in the config file
+                self.error(f"Flake8 failed: {e!r}")
+                return False
+            if flake8.result_count == 0:
+                self.ok("Flake8 linting passed")
+                return True
+            with open(output_file) as f:
+                self._report_flake8(f.read())
+            return False
+
+    def _check_flake8_command(self) -> bool:
+        """Run the flake8 executable, for when flake8 is not importable here."""
         try:
             result = subprocess.run(
                 ['flake8', '.', '--max-line-length=120'],
@@ -80,29 +168,44 @@ class FactChecker:
                 text=True,
                 cwd=self.root_dir
             )
-            if result.returncode == 0:
-                self.ok("Flake8 linting passed")
-                return True
-            else:
-                for line in result.stdout.strip().split('\n'):
-                    if line:
-                        self.error(f"Flake8: {line}")
-                return False
         except FileNotFoundError:
             self.warn("Flake8 not installed, skipping lint check")
             return True
+        if result.returncode == 0:
+            self.ok("Flake8 linting passed")
+            return True
+        self._report_flake8(result.stdout)
+        return False
+
+    def _flake8_config_file(self):
+        """Return the root's flake8 config file, as flake8 run from the root would find it."""
+        for name in ('setup.cfg', 'tox.ini', '.flake8'):
+            path = self.root_dir / name
+            if path.is_file() and b'[flake8' in path.read_bytes():
+                return path
+        return None
+
+    def _report_flake8(self, output: str):
+        for line in output.strip().split('\n'):
+            if line:
+                self.error(f"Flake8: {line}")
 
     def check_imports(self, filepath: Path) -> bool:
         """Verify imports are available."""
         try:
-            with open(filepath) as f:
-                tree = ast.parse(f.read())
+            tree = self._parse(filepath)
         except SyntaxError:
             return False  # Already reported
 
+        # Only module-level statements matter here; descend into if/try blocks
+        # for conditional imports but skip function and class bodies.
         imports = set()
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Import):
+        nodes = list(tree.body)
+        while nodes:
+            node = nodes.pop()
+            if isinstance(node, (ast.If, ast.Try, ast.ExceptHandler)):
+                nodes.extend(ast.iter_child_nodes(node))
+            elif isinstance(node, ast.Import):
                 for alias in node.names:
                     imports.add(alias.name.split('.')[0])
             elif isinstance(node, ast.ImportFrom):
@@ -112,19 +215,17 @@ class FactChecker:
         all_ok = True
         for imp in REQUIRED_IMPORTS:
             if imp in imports:
-                try:
-                    __import__(imp)
+                if self._can_import(imp):
                     self.ok(f"Import '{imp}' available")
-                except ImportError:
+                else:
                     self.error(f"Required import '{imp}' not available")
                     all_ok = False
 
         for imp in OPTIONAL_IMPORTS:
             if imp in imports:
-                try:
-                    __import__(imp)
+                if self._can_import(imp):
                     self.ok(f"Optional import '{imp}' available")
-                except ImportError:
+                else:
                     self.warn(f"Optional import '{imp}' not available")
 
         return all_ok
@@ -136,15 +237,12 @@ class FactChecker:
             self.error(f"Extension {ext_dir.name} missing event_map.yaml")
             return False
 
-        try:
-            import yaml
-        except ImportError:
+        if not _YAML_LOADED:
             self.warn("PyYAML not available, skipping extension validation")
             return True
 
         try:
-            with open(event_map_file) as f:
-                event_map = yaml.safe_load(f)
+            event_map = yaml.load(event_map_file.read_bytes(), Loader=_YamlLoader)
         except yaml.YAMLError as e:
             self.error(f"YAML parse error in {event_map_file}: {e}")
             return False
@@ -159,12 +257,11 @@ class FactChecker:
         else:
             self.ok(f"Extension {ext_dir.name}: apiVersion OK")
 
-        # Check valid keys
-        valid_keys = {'apiVersion', 'image', 'sound'}
-        for key in event_map.keys():
-            if key not in valid_keys:
+        # Check valid keys; one subset test, walking the keys only to report failures
+        if not event_map.keys() <= VALID_EVENT_MAP_KEYS:
+            for key in event_map.keys() - VALID_EVENT_MAP_KEYS:
                 self.error(f"Extension {ext_dir.name}: unknown key '{key}'")
-                all_ok = False
+            all_ok = False
 
         # Validate image mappings
         if 'image' in event_map:
@@ -177,20 +274,27 @@ class FactChecker:
                 all_ok = False
 
             # Check that named_file args reference existing files
+            # against one listing of the sounds directory
             sounds_dir = ext_dir / 'sounds'
+            try:
+                sound_names = set(os.listdir(sounds_dir))
+            except OSError:
+                sound_names = None
             for step in event_map['sound']:
-                if step.get('policy') == 'named_file':
+                if step.get('policy') == 'named_file' and sound_names is not None:
                     args = step.get('args', [])
+                    # Usually every arg is listed; only walk them one by one when one is not
+                    if sound_names.issuperset(args):
+                        continue
                     for arg in args:
-                        if sounds_dir.exists():
-                            sound_file = sounds_dir / arg
-                            if not sound_file.exists():
-                                self.error(f"Extension {ext_dir.name}: sound file not found: {arg}")
-                                all_ok = False
+                        # Only stat args that are not plain names in the listing (e.g. subpaths)
+                        if arg not in sound_names and not (sounds_dir / arg).exists():
+                            self.error(f"Extension {ext_dir.name}: sound file not found: {arg}")
+                            all_ok = False
 
         return all_ok
 
-    def _validate_mappings(self, ext_name: str, mapping_type: str, mappings: list, valid_policies: list) -> bool:
+    def _validate_mappings(self, ext_name: str, mapping_type: str, mappings: list, valid_policies: frozenset) -> bool:
         """Validate a list of mapping steps."""
         all_ok = True
         has_fallback = False
@@ -216,14 +320,14 @@ class FactChecker:
 
             # Validate checks
             if 'check' in step:
-                for j, check in enumerate(step['check']):
+                for check in step['check']:
                     if 'type' in check:
                         if check['type'] not in VALID_CHECK_TYPES:
                             self.error(f"Extension {ext_name}: invalid check type '{check['type']}'")
                             all_ok = False
                     elif 'unicode' in check:
                         u = check['unicode']
-                        if not any(k in u for k in VALID_UNICODE_CHECKS):
+                        if VALID_UNICODE_CHECKS.isdisjoint(u):
                             self.error(f"Extension {ext_name}: invalid unicode check keys")
                             all_ok = False
                     else:
@@ -242,28 +346,28 @@ class FactChecker:
         req_file = self.root_dir / 'requirements.txt'
         if req_file.exists():
             with open(req_file) as f:
-                reqs = f.read()
-            if 'pygame' in reqs.lower():
+                reqs = f.read().lower()
+            if 'pygame' in reqs:
                 self.ok("pygame in requirements.txt")
             else:
                 self.warn("pygame not in requirements.txt")
 
-            if 'yaml' in reqs.lower() or 'pyyaml' in reqs.lower():
+            if 'yaml' in reqs:  # also matches pyyaml
                 self.ok("PyYAML in requirements.txt")
             else:
                 self.warn("PyYAML not in requirements.txt (extensions won't work)")
 
         # Check for problematic patterns
-        for py_file in self.root_dir.glob('*.py'):
-            with open(py_file) as f:
-                content = f.read()
+        for py_file in self._root_py_files():
+            content = self._read(py_file)
+            found = {match.lastindex for match in _PI5_PATTERNS.finditer(content)}
 
             # Check for subprocess calls that might not work
-            if 'subprocess' in content and 'shell=True' in content:
+            if 1 in found and b'subprocess' in content:
                 self.warn(f"{py_file.name}: Uses shell=True in subprocess (potential security issue)")
 
             # Check for hardcoded paths
-            if '/usr/lib' in content or '/opt/' in content:
+            if 2 in found:
                 self.warn(f"{py_file.name}: Contains hardcoded system paths")
 
         return all_ok
@@ -278,7 +382,7 @@ class FactChecker:
 
         # Check main Python files
         print("\n📋 Checking Python syntax...")
-        for py_file in self.root_dir.glob('*.py'):
+        for py_file in self._root_py_files():
             if not self.check_python_syntax(py_file):
                 all_ok = False
 
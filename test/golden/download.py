@@ -22,12 +22,16 @@ import shutil
 import subprocess
 import sys
 import yaml
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
 
 os.chdir(os.path.dirname(sys.argv[0]))
 subprocess.check_call(["gh", "run", "download"] + sys.argv[1:])
 
 with open("../../.github/workflows/python-app.yml") as workflow_file:
-    workflow = yaml.full_load(workflow_file)
+    workflow = yaml.load(workflow_file, Loader=YamlLoader)
     matrix = workflow["jobs"]["e2e"]["strategy"]["matrix"]
     python_versions = matrix["python-version"]
     extensions = matrix["extension"]